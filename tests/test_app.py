@@ -5,64 +5,138 @@ This module contains comprehensive tests for all API endpoints
 including signup, unregister, and activity listing functionality.
 """
 
+import asyncio
+from urllib.parse import quote, unquote
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from src.app import app, activities
-import copy
 
+CHESS = "Chess Club"
+PROGRAMMING = "Programming Class"
+NONEXISTENT = "Nonexistent Activity"
 
-@pytest.fixture
+CHESS_SIGNUP = f"/activities/{quote(CHESS)}/signup"
+CHESS_UNREGISTER = f"/activities/{quote(CHESS)}/unregister"
+PROGRAMMING_SIGNUP = f"/activities/{quote(PROGRAMMING)}/signup"
+NONEXISTENT_SIGNUP = f"/activities/{quote(NONEXISTENT)}/signup"
+NONEXISTENT_UNREGISTER = f"/activities/{quote(NONEXISTENT)}/unregister"
+
+
+async def asgi_call(app, method, path, query=b""):
+    """Call the ASGI application directly, returning (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query,
+        "headers": [],
+        "server": ("test", 80),
+    }
+    messages = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return start["status"], headers, body
+
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI application."""
+    """Create a test client shared by the whole test session."""
     return TestClient(app)
 
 
 @pytest.fixture
-def backup_activities():
-    """Create a backup of activities data and restore after test."""
-    original_activities = copy.deepcopy(activities)
+def async_client():
+    """Create an async client that calls the ASGI application in-process."""
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield client
+    # Close on a private loop so the concurrent group's current loop is left in place
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(client.aclose())
+    finally:
+        loop.close()
+
+
+@pytest.fixture(scope="session")
+def activities_snapshot(client):
+    """Fetch and parse the activity listing once for read-only tests."""
+    response = client.get("/activities")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture(autouse=True)
+def restore_activities(request):
+    """Restore participant lists after tests marked ``mutates_activities``."""
+    if request.node.get_closest_marker("mutates_activities") is None:
+        yield
+        return
+    snapshot = {name: list(activity["participants"]) for name, activity in activities.items()}
     yield
-    activities.clear()
-    activities.update(original_activities)
+    for name, participants in snapshot.items():
+        activities[name]["participants"][:] = participants
 
 
 class TestActivityEndpoints:
     """Test class for activity-related endpoints."""
 
-    def test_root_redirect(self, client):
+    @pytest.mark.asyncio_concurrent(group="readonly")
+    async def test_root_redirect(self):
         """Test that root endpoint redirects to static index.html."""
-        response = client.get("/", allow_redirects=False)
-        assert response.status_code == 307
-        assert "/static/index.html" in response.headers["location"]
+        status, headers, _ = await asgi_call(app, "GET", "/")
+        assert status == 307
+        assert "/static/index.html" in headers["location"]
 
-    def test_get_activities(self, client):
-        """Test getting all activities."""
-        response = client.get("/activities")
-        assert response.status_code == 200
-        
-        data = response.json()
+    def test_activities_shape(self, activities_snapshot):
+        """Test that all activities are listed with the correct structure."""
+        data = activities_snapshot
         assert isinstance(data, dict)
-        assert len(data) > 0
         
-        # Check if required fields exist for each activity
+        # Test specific activities that should exist
+        assert CHESS in data
+        assert PROGRAMMING in data
+        assert "Gym Class" in data
+        
+        # Check required fields and their types for each activity
         for activity_name, activity_data in data.items():
-            assert "description" in activity_data
-            assert "schedule" in activity_data
-            assert "max_participants" in activity_data
-            assert "participants" in activity_data
+            assert isinstance(activity_data["description"], str)
+            assert isinstance(activity_data["schedule"], str)
+            assert isinstance(activity_data["max_participants"], int)
             assert isinstance(activity_data["participants"], list)
+            assert activity_data["max_participants"] > 0
 
-    def test_signup_for_activity_success(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_signup_for_activity_success(self, client):
         """Test successful signup for an activity."""
         email = "test@mergington.edu"
-        activity_name = "Chess Club"
+        activity_name = CHESS
         
         # Get initial participant count
-        initial_response = client.get("/activities")
-        initial_participants = len(initial_response.json()[activity_name]["participants"])
+        initial_participants = len(activities[activity_name]["participants"])
         
         # Sign up for activity
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = client.post(CHESS_SIGNUP, params={"email": email})
         assert response.status_code == 200
         
         data = response.json()
@@ -71,49 +145,53 @@ class TestActivityEndpoints:
         assert activity_name in data["message"]
         
         # Verify participant was added
-        updated_response = client.get("/activities")
-        updated_participants = updated_response.json()[activity_name]["participants"]
+        updated_participants = activities[activity_name]["participants"]
         assert len(updated_participants) == initial_participants + 1
         assert email in updated_participants
 
-    def test_signup_duplicate_registration(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_signup_duplicate_registration(self, client):
         """Test that duplicate registration is prevented."""
         email = "test@mergington.edu"
-        activity_name = "Chess Club"
+        activity_name = CHESS
         
         # First signup should succeed
-        response1 = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response1 = client.post(CHESS_SIGNUP, params={"email": email})
         assert response1.status_code == 200
         
         # Second signup should fail
-        response2 = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response2 = client.post(CHESS_SIGNUP, params={"email": email})
         assert response2.status_code == 400
         assert "already signed up" in response2.json()["detail"].lower()
 
-    def test_signup_nonexistent_activity(self, client):
-        """Test signup for non-existent activity."""
-        email = "test@mergington.edu"
-        activity_name = "Nonexistent Activity"
-        
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
-        assert response.status_code == 404
-        assert "not found" in response.json()["detail"].lower()
+    @pytest.mark.asyncio_concurrent(group="readonly")
+    @pytest.mark.parametrize(
+        "method, path, email, expected_status, detail_substr",
+        [
+            ("POST", NONEXISTENT_SIGNUP, "test@mergington.edu", 404, "not found"),
+            ("DELETE", CHESS_UNREGISTER, "notregistered@mergington.edu", 400, "not registered"),
+            ("DELETE", NONEXISTENT_UNREGISTER, "test@mergington.edu", 404, "not found"),
+        ],
+        ids=["signup-nonexistent-activity", "unregister-not-registered", "unregister-nonexistent-activity"],
+    )
+    async def test_error_responses(self, async_client, method, path, email, expected_status, detail_substr):
+        """Test error responses for unknown activities and unregistered students."""
+        response = await async_client.request(method, path, params={"email": email})
+        assert response.status_code == expected_status
+        assert detail_substr in response.json()["detail"].lower()
 
-    def test_unregister_from_activity_success(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_unregister_from_activity_success(self, client):
         """Test successful unregistration from an activity."""
         email = "test@mergington.edu"
-        activity_name = "Chess Club"
+        activity_name = CHESS
         
-        # First sign up
-        signup_response = client.post(f"/activities/{activity_name}/signup?email={email}")
-        assert signup_response.status_code == 200
-        
-        # Get participant count after signup
-        activities_response = client.get("/activities")
-        participants_after_signup = len(activities_response.json()[activity_name]["participants"])
+        # Seed the registration directly; only the unregister call is under test
+        activities[activity_name]["participants"].append(email)
+        participants_after_signup = len(activities[activity_name]["participants"])
         
         # Then unregister
-        unregister_response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        unregister_response = client.delete(CHESS_UNREGISTER, params={"email": email})
         assert unregister_response.status_code == 200
         
         data = unregister_response.json()
@@ -122,118 +200,77 @@ class TestActivityEndpoints:
         assert activity_name in data["message"]
         
         # Verify participant was removed
-        final_response = client.get("/activities")
-        final_participants = final_response.json()[activity_name]["participants"]
+        final_participants = activities[activity_name]["participants"]
         assert len(final_participants) == participants_after_signup - 1
         assert email not in final_participants
 
-    def test_unregister_not_registered(self, client):
-        """Test unregistering when not registered."""
-        email = "notregistered@mergington.edu"
-        activity_name = "Chess Club"
-        
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
-        assert response.status_code == 400
-        assert "not registered" in response.json()["detail"].lower()
-
-    def test_unregister_nonexistent_activity(self, client):
-        """Test unregistering from non-existent activity."""
-        email = "test@mergington.edu"
-        activity_name = "Nonexistent Activity"
-        
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
-        assert response.status_code == 404
-        assert "not found" in response.json()["detail"].lower()
-
-    def test_activity_data_structure(self, client):
-        """Test that activity data has correct structure."""
-        response = client.get("/activities")
-        assert response.status_code == 200
-        
-        activities_data = response.json()
-        
-        # Test specific activities that should exist
-        expected_activities = ["Chess Club", "Programming Class", "Gym Class"]
-        for activity in expected_activities:
-            assert activity in activities_data
-            
-            activity_data = activities_data[activity]
-            assert isinstance(activity_data["description"], str)
-            assert isinstance(activity_data["schedule"], str)
-            assert isinstance(activity_data["max_participants"], int)
-            assert isinstance(activity_data["participants"], list)
-            assert activity_data["max_participants"] > 0
-
-    def test_email_encoding_in_urls(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_email_encoding_in_urls(self, client):
         """Test that email addresses with special characters are handled correctly."""
         email = "test+user@mergington.edu"
-        activity_name = "Chess Club"
+        activity_name = CHESS
         
         # Test signup with encoded email
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = client.post(CHESS_SIGNUP, params={"email": email})
         assert response.status_code == 200
         
         # Verify the email was stored correctly
-        activities_response = client.get("/activities")
-        participants = activities_response.json()[activity_name]["participants"]
+        participants = activities[activity_name]["participants"]
         assert email in participants
         
         # Test unregister with encoded email
-        unregister_response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        unregister_response = client.delete(CHESS_UNREGISTER, params={"email": email})
         assert unregister_response.status_code == 200
 
-    def test_activity_names_with_spaces(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_activity_names_with_spaces(self, client):
         """Test handling activity names with spaces."""
         email = "test@mergington.edu"
-        activity_name = "Programming Class"  # This has a space
+        activity_name = PROGRAMMING  # This has a space
         
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = client.post(PROGRAMMING_SIGNUP, params={"email": email})
         assert response.status_code == 200
         
         # Verify signup worked
-        activities_response = client.get("/activities")
-        participants = activities_response.json()[activity_name]["participants"]
+        participants = activities[activity_name]["participants"]
         assert email in participants
 
 
 class TestEdgeCases:
     """Test class for edge cases and error conditions."""
 
+    @pytest.mark.mutates_activities
     def test_empty_email(self, client):
         """Test signup with empty email."""
-        activity_name = "Chess Club"
-        
-        response = client.post(f"/activities/{activity_name}/signup?email=")
+        response = client.post(CHESS_SIGNUP, params={"email": ""})
         # The behavior might vary, but it should either succeed with empty string
         # or fail gracefully
         assert response.status_code in [200, 400, 422]
 
-    def test_missing_email_parameter(self, client):
+    @pytest.mark.asyncio_concurrent(group="edge-readonly")
+    async def test_missing_email_parameter(self):
         """Test signup without email parameter."""
-        activity_name = "Chess Club"
-        
-        response = client.post(f"/activities/{activity_name}/signup")
-        assert response.status_code == 422  # Validation error
+        status, _, _ = await asgi_call(app, "POST", CHESS_SIGNUP)
+        assert status == 422  # Validation error
 
-    def test_multiple_signups_different_activities(self, client, backup_activities):
+    @pytest.mark.mutates_activities
+    def test_multiple_signups_different_activities(self, client):
         """Test that same email can sign up for different activities."""
         email = "test@mergington.edu"
-        activity1 = "Chess Club"
-        activity2 = "Programming Class"
+        activity1 = CHESS
+        activity2 = PROGRAMMING
         
         # Sign up for first activity
-        response1 = client.post(f"/activities/{activity1}/signup?email={email}")
+        response1 = client.post(CHESS_SIGNUP, params={"email": email})
         assert response1.status_code == 200
         
         # Sign up for second activity
-        response2 = client.post(f"/activities/{activity2}/signup?email={email}")
+        response2 = client.post(PROGRAMMING_SIGNUP, params={"email": email})
         assert response2.status_code == 200
         
         # Verify both signups
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity1]["participants"]
-        assert email in activities_data[activity2]["participants"]
+        assert email in activities[activity1]["participants"]
+        assert email in activities[activity2]["participants"]
 
 
 if __name__ == "__main__":